@@ -1,13 +1,20 @@
 """Module that provide the Meteosource interface object"""
 
+import asyncio
 import datetime as dt
 
-from .request_handler import RequestHandler
-from .types import langs, sections, units, endpoints, time_formats
+from .request_handler import (RequestHandler, HTTPXRequestHandler,
+                              AsyncRequestHandler, warn_use_gzip)
+from .types import (langs, sections, units, endpoints, time_formats,
+                    transports)
 from .errors import (InvalidArgumentError, InvalidDateFormat, InvalidDateRange,
-                     InvalidDateSpecification)
+                     InvalidDateSpecification, InvalidTransportError)
 from .data import Forecast, TimeMachine
 
+# Bit masks of specified location arguments (place_id, lat, lon) that are valid
+PLACE_ID_MASK = 0b100
+LAT_LON_MASK = 0b011
+
 
 class Meteosource:
     """
@@ -15,12 +22,18 @@ class Meteosource:
 
     Attributes
     ----------
+    api_key : string
+        The API key, used to initialize AsyncRequestHandler when needed
     req_handler : RequestHandler
-        RequestHandler object to be used for the requests
+        RequestHandler object to be used for the requests, shared by all
+        instances using the same API key
     host : string
         The host URL of the Meteosource API
     tier : string
         The tier the user is using
+    _urls : dict
+        URLs of the endpoints for the host and tier, built on first use and
+        rebuilt when the host or tier changes
 
     Methods
     -------
@@ -28,21 +41,70 @@ class Meteosource:
         Build URL for the request
     get_point_forecast
         Get forecast data for given point
+    get_point_forecasts_async
+        Get forecast data for multiple points concurrently
     """
     def __init__(self, api_key, tier, host='https://www.meteosource.com/api',
-                 use_gzip=True):
+                 use_gzip=None, transport=transports.REQUESTS):
         """
         Basic constructor
 
         :param str: API key
         :param str: Tier the user is using
         :param str: Host URL of the Meteosource API
-        :param bool: True if gzip compression should be used, False otherwise
+        :param None: Deprecated, compression is always used
+        :param str: Transport to use for the requests
         """
+        if use_gzip is not None:
+            warn_use_gzip()
+
+        # Get the request handler class for the transport
+        if transport == transports.REQUESTS:
+            handler_class = RequestHandler
+        elif transport == transports.HTTPX2:
+            handler_class = HTTPXRequestHandler
+        else:
+            raise InvalidTransportError(transport)
+
         # Initialize the request handler with the API key
-        self.req_handler = RequestHandler(api_key, use_gzip)
-        self.host = host
-        self.tier = tier
+        self.api_key = api_key
+        # (the handler is shared by all instances with the same API key)
+        self.req_handler = handler_class.get(api_key)
+        self._host = host
+        self._tier = tier
+        self._reset_urls()
+
+    @property
+    def host(self):
+        """
+        The host URL of the Meteosource API
+        """
+        return self._host
+
+    @host.setter
+    def host(self, host):
+        self._host = host
+        self._reset_urls()
+
+    @property
+    def tier(self):
+        """
+        The tier the user is using
+        """
+        return self._tier
+
+    @tier.setter
+    def tier(self, tier):
+        self._tier = tier
+        self._reset_urls()
+
+    def _reset_urls(self):
+        """
+        Build the base URL for current host and tier and clear cached URLs
+        """
+        # The base URL is only built once, endpoint URLs are cached
+        self._base_url = '{}/v1/{}'.format(self._host, self._tier)
+        self._urls = {}
 
     def _build_url(self, endpoint):
         """
@@ -51,8 +113,10 @@ class Meteosource:
         :param str: Endpoint for the request
         :return str: The URL of the request without parameters (lat, lon, ...)
         """
-        pars = {'host': self.host, 'tier': self.tier, 'endpoint': endpoint}
-        url = '{host}/v1/{tier}/{endpoint}'.format(**pars)
+        url = self._urls.get(endpoint)
+        if url is None:
+            url = self._urls[endpoint] = '{}/{}'.format(self._base_url,
+                                                        endpoint)
 
         return url
 
@@ -71,26 +135,23 @@ class Meteosource:
         :param float: Longitude of the point
         :return dict: Dictionary with location parameter(s) set
         """
-        # If place_id is not specified, we use lat+lon
-        if place_id is None:
-            # Check if both lat+lon are specified
-            if lat is None or lon is None:
-                raise InvalidArgumentError()
-            # Add the lat+lon to the parameters
-            pars.update({'lat': lat, 'lon': lon})
+        # Encode which of place_id, lat, lon are specified as bits
+        mask = ((place_id is not None) << 2 | (lat is not None) << 1
+                | (lon is not None))
+        # Only place_id alone or lat+lon together are valid
+        if mask == PLACE_ID_MASK:
+            pars['place_id'] = place_id
+        elif mask == LAT_LON_MASK:
+            pars['lat'], pars['lon'] = lat, lon
         else:
-            # Check that only place_id is specified
-            if lat is not None or lon is not None:
-                raise InvalidArgumentError()
-            # Add the place_id to the parameters
-            pars.update({'place_id': place_id})
+            raise InvalidArgumentError()
 
         return pars
 
     def get_point_forecast(self, place_id=None, lat=None, lon=None,
                            sections=(sections.CURRENT, sections.HOURLY),
                            tz='UTC', lang=langs.ENGLISH, units=units.AUTO,
-                           endpoint=endpoints.POINT):
+                           endpoint=endpoints.POINT, no_cache=False):
         """
         Get forecast data for given point
 
@@ -102,6 +163,7 @@ class Meteosource:
         :param str: Language
         :param str: Units to use
         :param str: Endpoint to use, can be overriden
+        :param bool: If True, cached responses are not used
         :return Forecast: Forecast object with the forecast data
         """
         # Build the URL for the request
@@ -116,11 +178,52 @@ class Meteosource:
         pars = self._build_location_pars(pars, place_id, lat, lon)
 
         # Execute the request with the built URL and parameters
-        data = self.req_handler.execute_request(url, **pars)
+        data = self.req_handler.execute_request(url, no_cache=no_cache, **pars)
 
         # Load the result into Forecast object and return it
         return Forecast(data, tz)
 
+    async def get_point_forecasts_async(
+            self, places, sections=(sections.CURRENT, sections.HOURLY),
+            tz='UTC', lang=langs.ENGLISH, units=units.AUTO,
+            endpoint=endpoints.POINT):
+        """
+        Get forecast data for multiple points concurrently
+
+        Each place is a dict with either 'place_id' or 'lat' and 'lon' keys.
+        The requests are sent concurrently using AsyncRequestHandler, so this
+        needs 'aiohttp' module installed. The responses are not cached.
+
+        :param iterable: Places to get the forecast for
+        :param str: Sections to return
+        :param str: Timezone for final output. Requests are always made in UTC!
+        :param str: Language
+        :param str: Units to use
+        :param str: Endpoint to use, can be overriden
+        :return list: Forecast objects in the same order as the places
+        """
+        # Build the URL for the request
+        url = self._build_url(endpoint)
+        if isinstance(sections, (list, tuple)):
+            sections = ','.join(sections)
+
+        # Build parameters for each place, the requested tz is always UTC!
+        pars_list = []
+        for place in places:
+            pars = {'language': lang, 'units': units, 'timezone': 'UTC',
+                    'sections': sections}
+            pars_list.append(self._build_location_pars(
+                pars, place.get('place_id'), place.get('lat'),
+                place.get('lon')))
+
+        # Execute all the requests concurrently within a single session
+        async with AsyncRequestHandler(self.api_key) as handler:
+            data = await asyncio.gather(
+                *[handler.execute_request(url, **p) for p in pars_list])
+
+        # Load the results into Forecast objects and return them
+        return [Forecast(d, tz) for d in data]
+
     def _str_to_date(self, date):
         """
         Convert passed date to datetime.date instance
@@ -180,7 +283,8 @@ class Meteosource:
 
     def get_time_machine(self, date=None, date_from=None, date_to=None,
                          place_id=None, lat=None, lon=None, tz='UTC',
-                         units=units.AUTO, endpoint=endpoints.TIME_MACHINE):
+                         units=units.AUTO, endpoint=endpoints.TIME_MACHINE,
+                         no_cache=False):
         """
         Get archive data from time_machine endpoint
 
@@ -197,6 +301,7 @@ class Meteosource:
         :param str: Timezone for final output. Requests are always made in UTC!
         :param str: Units to use
         :param str: Endpoint to use, can be overriden
+        :param bool: If True, cached responses are not used
         :return TimeMachine: TimeMachine object with the archive data
         """
         # Build the URL for the request
@@ -228,7 +333,8 @@ class Meteosource:
                 raise InvalidDateFormat(d, 'str or date instance')
 
             # Execute the request with the built URL and parameters
-            data = self.req_handler.execute_request(url, **pars)
+            data = self.req_handler.execute_request(url, no_cache=no_cache,
+                                                    **pars)
 
             # Create a TimeMachine instance
             cur_tm = TimeMachine(data, tz, d)
@@ -1,6 +1,7 @@
 """Module with classes that represent the API data"""
 
 from warnings import warn
+from collections.abc import Mapping
 from datetime import datetime, date
 import pytz
 
@@ -30,6 +31,8 @@ class BaseData:
     to_pandas
         Export the data to pandas DataFrame
     """
+    __slots__ = ('_timezone',)
+
     def __init__(self, timezone):
         """
         :param str: String identifier of used timezone
@@ -63,7 +66,7 @@ class BaseData:
         # Iterate over the keys of the 'data' dict
         for key, value in data.items():
             # For nested data, initialize SingleTimeData instance
-            if isinstance(value, dict):
+            if isinstance(value, Mapping):
                 # Save the data into the instance attribute
                 setattr(self, key, SingleTimeData(value, self._timezone))
             else:
@@ -115,8 +118,16 @@ class BaseData:
                  "Try to install pandas with 'pip install pandas'.")
             return None
 
-        # This is the basic use case - rows are the timesteps
-        if isinstance(self, (MultipleTimesData, AlertsData)):
+        # Rows are the timesteps, the index of the dates is only built once
+        if isinstance(self, MultipleTimesData):
+            # Build the DataFrame from the flat records at once, the shallow
+            # copy of the index prevents renaming it from affecting the cache
+            records = [x.to_dict() for x in self.data]  # pylint: disable=E1101
+            return pd.DataFrame.from_records(
+                records, index=self._get_pandas_index(pd).copy(),
+                exclude=[self._date_col])
+        # This is the basic use case - rows are the alerts
+        if isinstance(self, AlertsData):
             # pylint: disable=E1101
             df = pd.DataFrame([x.to_dict() for x in self.data])
         # This is also possible, but results in 1-row DataFrame
@@ -261,17 +272,67 @@ class SingleTimeData(BaseData):
     This class is used to represent 'current' section, and the individual
     timesteps of 'minutely', 'hourly' and 'daily'.
 
+    There are thousands of instances in a single response, so they do not
+    have '__dict__'. Instead, each instance is of a subclass with '__slots__'
+    matching the variables in the data. The subclasses are created once for
+    each set of variables and reused, so e.g. all hourly timesteps share one.
+    Because of this, no other member variables can be set to the instances.
+    Variables whose names are not valid identifiers or clash with the class
+    members are stored in '__dict__', which is only present in such case.
+
+    Attributes
+    ----------
+    _classes : dict
+        Subclasses with '__slots__', keyed by tuple of the variable names
+
     Methods
     -------
     to_dict
         Export the data to flat (not nested) dict
     """
+    __slots__ = ()
+    _classes = {}
+
+    def __new__(cls, data=None, timezone=None):  # pylint: disable=W0613
+        """
+        Create instance of subclass with '__slots__' for the data variables
+
+        :param dict: The section data, its keys are used as the slots
+        :param str: String identifier of used timezone
+        """
+        # Subclasses were already selected, so we create them directly
+        if cls is not SingleTimeData:
+            return super().__new__(cls)
+
+        keys = tuple(data) if data is not None else ()
+        sub = cls._classes.get(keys)
+        if sub is None:
+            # Only valid names that do not clash with the class can be slots
+            slots = tuple(k for k in keys if isinstance(k, str)
+                          and k.isidentifier() and not hasattr(cls, k))
+            # The other variables are stored in '__dict__' as usual
+            if len(slots) < len(keys):
+                slots += ('__dict__',)
+            sub = type(cls.__name__, (cls,),
+                       {'__slots__': slots, '__module__': cls.__module__})
+            cls._classes[keys] = sub
+        return super().__new__(sub)
+
     def __init__(self, data, timezone):
         # Call the parent's constructor to initialize the timezone
         super().__init__(timezone)
         # Load the data
         self.load_data(data)
 
+    def __reduce__(self):
+        """
+        Override __reduce__ to support pickling and copying of the instances
+        """
+        members = {x: getattr(self, x) for x in self.__slots__
+                   if x != '__dict__'}
+        members.update(getattr(self, '__dict__', {}))
+        return _restore_single_time_data, (self._timezone, members)
+
     def to_dict(self, prefix=''):
         """
         Export the data to flat (not nested) dict
@@ -300,6 +361,21 @@ class SingleTimeData(BaseData):
         return res
 
 
+def _restore_single_time_data(timezone, members):
+    """
+    Restore pickled or copied SingleTimeData instance
+
+    :param str: String identifier of used timezone
+    :param dict: The already loaded member variables
+    :return SingleTimeData: The restored instance
+    """
+    res = SingleTimeData.__new__(SingleTimeData, members)
+    BaseData.__init__(res, timezone)
+    for key, value in members.items():
+        setattr(res, key, value)
+    return res
+
+
 class MultipleTimesData(BaseData):
     """
     Class that represents data in multiple points in time
@@ -319,7 +395,17 @@ class MultipleTimesData(BaseData):
         List of 'str' dates of the timesteps (in the same order)
     dates_dt : list
         List of 'datetime' dates of the timesteps (in the same order)
+    _date_col : str
+        Name of the variable with the date of the timestep ('date' or 'day')
+    _pandas_index : pandas.Index
+        Cached index of the dates for pandas export, built on first export
+    _str_index : dict
+        Position of the first timestep for each 'str' date
+    _dt_index : dict
+        Position of the first timestep for each 'datetime' date
     """
+    _pandas_index = None
+
     def __init__(self, data, data_type, timezone):
         # Call the parent's constructor to initialize the timezone
         super().__init__(timezone)
@@ -333,6 +419,7 @@ class MultipleTimesData(BaseData):
             date_col, form = 'day', F2
         else:
             date_col, form = 'date', F1
+        self._date_col = date_col
 
         # Build the list of SingleTimeData instances from the data
         self.data = [SingleTimeData(x, self._timezone) for x in data['data']]
@@ -340,6 +427,9 @@ class MultipleTimesData(BaseData):
         self.dates_str = [x[date_col].strftime(form) for x in self.data]
         # Build the list of corresponding 'datetime' dates
         self.dates_dt = [x[date_col] for x in self.data]
+        # Build the mappings of the dates to positions for [] access
+        self._str_index, self._dt_index = {}, {}
+        self._update_indices(0)
 
         # If summary is present, save it
         if 'summary' in data:
@@ -356,9 +446,41 @@ class MultipleTimesData(BaseData):
             raise InvalidClassType(type(other))
 
         # Append all data structures
+        start = len(self.data)
         self.data += other.data
         self.dates_str += other.dates_str
         self.dates_dt += other.dates_dt
+        # Add the appended dates to the mappings
+        self._update_indices(start)
+        # The cached pandas index is no longer valid
+        self._pandas_index = None
+
+    def _update_indices(self, start):
+        """
+        Add dates of the timesteps from 'start' on to the [] access mappings
+
+        On long day, there can be two timesteps with the same string
+        representation of the datetime, so only the first occurence is kept.
+
+        :param int: Position of the first timestep to add
+        """
+        for i in range(start, len(self.dates_str)):
+            self._str_index.setdefault(self.dates_str[i], i)
+            self._dt_index.setdefault(self.dates_dt[i], i)
+
+    def _get_pandas_index(self, pd):
+        """
+        Get pandas index of the timesteps' dates
+
+        The index is built from 'dates_dt' at once on the first call and
+        cached, so repeated exports do not need to parse the dates again.
+
+        :param module: The imported pandas module
+        :return pandas.Index: DatetimeIndex (or Index for plain dates)
+        """
+        if self._pandas_index is None:
+            self._pandas_index = pd.Index(self.dates_dt, name=self._date_col)
+        return self._pandas_index
 
     def __repr__(self):
         """
@@ -397,16 +519,17 @@ class MultipleTimesData(BaseData):
         if isinstance(attr, int):
             return self.data[attr]
         """
-        For string, we use 'dates_str' list and return the data with
-        'date'/'day' corresponding to first occurence in 'date_str'. On long
-        day, there can be two timesteps with the same string representation of
-        the datetime, which is why the 'first occurence' is mentioned here.
+        For string, we look up the position in '_str_index' and return the data
+        with 'date'/'day' corresponding to first occurence in 'date_str'. On
+        long day, there can be two timesteps with the same string
+        representation of the datetime, which is why the 'first occurence' is
+        mentioned here.
         """
         if isinstance(attr, str):
-            if attr not in self.dates_str:
+            if attr not in self._str_index:
                 raise InvalidStrIndexError(attr)
-            return self.data[self.dates_str.index(attr)]
-        # For datetimes, we localize it if necessary and use 'dates_dt' list
+            return self.data[self._str_index[attr]]
+        # For datetimes, we localize it if necessary and use '_dt_index'
         if isinstance(attr, datetime):
             # If the datetime is naive
             if attr.tzinfo is None:
@@ -414,9 +537,9 @@ class MultipleTimesData(BaseData):
             else:
                 # If it is tz-aware, we convert it to the same timezone
                 attr = attr.astimezone(pytz.timezone(self._timezone))
-            if attr not in self.dates_dt:
+            if attr not in self._dt_index:
                 raise InvalidDatetimeIndexError(attr)
-            return self.data[self.dates_dt.index(attr)]
+            return self.data[self._dt_index[attr]]
 
         raise InvalidIndexTypeError(attr)
 
@@ -513,7 +636,12 @@ class TimeMachine:
         self.elevation = data['elevation']
         self.timezone = tz
         self.units = data['units']
-        self.data = MultipleTimesData(data, 'time_machine', self.timezone)
+        # Assing human-readable weather category from icon number
+        hours = [dict(x, weather=ICONS.get(x['icon'], 1)['weather'],
+                      weather_id=ICONS.get(x['icon'], 1)['weather_id'])
+                 for x in data['data']]
+        self.data = MultipleTimesData(dict(data, data=hours), 'time_machine',
+                                      self.timezone)
         # Preprocess statistics to fit data structures
         statistics = {'data': [{'statistics': data['statistics']}]}
         statistics['data'][0]['day'] = day
@@ -523,11 +651,6 @@ class TimeMachine:
         daily['data'][0]['day'] = day
         self.daily = MultipleTimesData(daily, 'daily', 'UTC')
 
-        # Assing human-readable weather category from icon number
-        for x in self.data.data:
-            x.weather = ICONS.get(x.icon, 1)['weather']
-            x.weather_id = ICONS.get(x.icon, 1)['weather_id']
-
     def append(self, other):
         """
         Append another TimeMachine instance's data to this instance
@@ -3,10 +3,31 @@
 class InvalidRequestError(ValueError):
     """
     Exception that is raised when API does not return 200 to a request
-    """
-    def __init__(self, response):
-        code, msg = response.status_code, response.text
-        self.message = 'API returned code %s with error: \n  %s' % (code, msg)
+
+    Attributes
+    ----------
+    MSG : string
+        The exceptions message to print
+    status_code : int
+        HTTP status code of the response
+    url : string
+        URL of the request
+    snippet : bytes
+        Beginning of the response body
+    """
+    MSG = 'API returned code %s for %s with error: \n  %s'
+
+    def __init__(self, status_code, url, snippet):
+        """
+        :param int: HTTP status code of the response
+        :param str: URL of the request
+        :param bytes: Beginning of the response body
+        """
+        self.status_code = status_code
+        self.url = url
+        self.snippet = snippet
+        text = snippet.decode('utf-8', errors='replace')
+        self.message = self.MSG % (status_code, url, text)
         super().__init__(self.message)
 
 
@@ -27,6 +48,25 @@ class InvalidArgumentError(ValueError):
         super().__init__(self.message)
 
 
+class InvalidTransportError(ValueError):
+    """
+    Exception that is raised when unknown transport is requested
+
+    Attributes
+    ----------
+    MSG : string
+        The exceptions message to print
+    """
+    MSG = 'Invalid transport "%s"!'
+
+    def __init__(self, transport):
+        """
+        :param str: The transport that was requested
+        """
+        self.message = self.MSG % transport
+        super().__init__(self.message)
+
+
 class EmptyInstanceError(ValueError):
     """
     Exception that is raised when access using [] attempted to empty instance
@@ -1,10 +1,153 @@
 """Module that handles sending the requests to API"""
 
+import random
+import time
+from collections import OrderedDict
+from functools import lru_cache
+from threading import Lock
+from urllib.parse import urlencode
+from warnings import warn
+
 import requests
 from requests.adapters import HTTPAdapter, Retry
+from urllib3.util import make_headers
+
+# Use faster 'orjson' for decoding the responses, if it is installed
+try:
+    from orjson import loads as json_loads
+except ImportError:
+    from json import loads as json_loads
 
 from .errors import InvalidRequestError
 
+# Maximum number of bytes of the error response passed to the exception
+ERROR_SNIPPET_SIZE = 512
+# Connect and read timeouts in seconds, connect is just over the 3 s TCP SYN
+# retransmit, so a dead connection is retried soon instead of after 10 s
+CONNECT_TIMEOUT = 3.05
+READ_TIMEOUT = 10
+
+
+@lru_cache(maxsize=128, typed=True)
+def encode_params(items, types):  # pylint: disable=W0613
+    """
+    Encode the request parameters to query string
+
+    The result is cached, so repeated requests with the same parameters
+    do not need to encode them again. Equal values of different types (e.g.
+    True and 1) are encoded differently, 'typed' only applies to the 'items'
+    tuple itself, so the types of the values are a part of the cache key.
+
+    :param tuple: Sorted tuple of (name, value) pairs of the parameters
+    :param tuple: Types of the values in 'items'
+    :return str: The encoded query string
+    """
+    return urlencode(items, doseq=True)
+
+
+def warn_use_gzip(stacklevel=3):
+    """
+    Warn that the deprecated 'use_gzip' parameter was passed
+
+    :param int: Stack level of the caller that passed the parameter
+    """
+    warn("Parameter 'use_gzip' is deprecated and has no effect, "
+         "compression is always used.", DeprecationWarning,
+         stacklevel=stacklevel)
+
+
+class TTLCache:
+    """
+    Bounded cache whose items expire after given time
+
+    When the cache is full, the least recently used item is dropped.
+
+    Attributes
+    ----------
+    maxsize : int
+        Maximum number of items in the cache
+    ttl : float
+        Number of seconds after which the items expire
+    """
+
+    def __init__(self, maxsize, ttl):
+        """
+        :param int: Maximum number of items in the cache
+        :param float: Number of seconds after which the items expire
+        """
+        self.maxsize = maxsize
+        self.ttl = ttl
+        # The items are stored as (expiration time, value)
+        self._data = OrderedDict()
+        self._lock = Lock()
+
+    def get(self, key):
+        """
+        Get the cached value
+
+        :param hashable: The key of the item
+        :return object: The cached value, or None if missing or expired
+        """
+        with self._lock:
+            item = self._data.get(key)
+            if item is None:
+                return None
+            if item[0] <= time.monotonic():
+                del self._data[key]
+                return None
+            self._data.move_to_end(key)
+            return item[1]
+
+    def set(self, key, value):
+        """
+        Store the value to the cache
+
+        :param hashable: The key of the item
+        :param object: The value to store
+        """
+        with self._lock:
+            self._data[key] = (time.monotonic() + self.ttl, value)
+            self._data.move_to_end(key)
+            if len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+
+    def clear(self):
+        """
+        Remove all the items from the cache
+        """
+        with self._lock:
+            self._data.clear()
+
+
+class JitterRetry(Retry):
+    """
+    Retry configuration with "full jitter" exponential backoff
+
+    The default urllib3 backoff is deterministic, so all clients hit by the
+    same failure retry at the same moments. Here the backoff is a random
+    value between 0 and the exponential backoff (capped at BACKOFF_CAP).
+
+    Attributes
+    ----------
+    BACKOFF_BASE : float
+        Base of the exponential backoff in seconds
+    BACKOFF_CAP : float
+        Maximum backoff in seconds
+    """
+    BACKOFF_BASE = 1.0
+    BACKOFF_CAP = 30.0
+
+    def get_backoff_time(self):
+        """
+        Get random backoff time from [0, min(cap, base * 2 ** attempt)]
+
+        :return float: Number of seconds to sleep before the next retry
+        """
+        attempt = len(self.history) if self.history else 0
+        return random.uniform(
+            0, min(self.BACKOFF_CAP, self.BACKOFF_BASE * 2 ** attempt))
+
+
 class RequestHandler:
     """
     Object that handles sending the requests to API
@@ -14,42 +157,347 @@ class RequestHandler:
     session : requests.sessions.Session
         A session object to send the requests. This can speed-up multiple
         requests within a program run.
+    cache : TTLCache
+        Cache of the responses, keyed by the URL and the parameters
+    timeout : tuple
+        Connect and read timeouts of the requests
+    CACHE_SIZE : int
+        Maximum number of cached responses
+    CACHE_TTL : float
+        Number of seconds the responses are cached for
+    _instances : dict
+        Instances shared within the process, keyed by the API key
+    _instances_lock : threading.Lock
+        Lock guarding the access to '_instances'
 
     Methods
     -------
+    get
+        Get the shared instance for given API key
+    evict
+        Remove the shared instance for given API key and close it
+    close
+        Close the session and clear the cache
     execute_request
         Execute request and return the JSON response
+    execute_request_stream
+        Execute request and iterate over items of the JSON response
     """
+    CACHE_SIZE = 256
+    CACHE_TTL = 300
+    _instances = {}
+    _instances_lock = Lock()
+
+    @classmethod
+    def get(cls, key, use_gzip=None):
+        """
+        Get the instance for given API key shared within the process
 
-    def __init__(self, key, use_gzip):
+        The instance is created on the first call, all the following calls
+        return the same instance, so its session and connection pool are
+        reused. Note that changes made to the instance (e.g. mocking its
+        methods) affect all its users.
+
+        :param str: The API key
+        :param None: Deprecated, compression is always used
+        :return RequestHandler: The shared instance
         """
+        if use_gzip is not None:
+            warn_use_gzip()
+        with cls._instances_lock:
+            handler = cls._instances.get(key)
+            if handler is None:
+                handler = cls._instances[key] = cls(key)
+            return handler
+
+    @classmethod
+    def evict(cls, key):
+        """
+        Remove the shared instance for given API key and close it
+
+        The Meteosource instances that already use the removed instance should
+        not be used anymore, the new ones get a new instance.
+
         :param str: The API key
-        :param bool: True if gzip compression should be used, False otherwise
         """
+        with cls._instances_lock:
+            handler = cls._instances.pop(key, None)
+        if handler is not None:
+            handler.close()
+
+    def close(self):
+        """
+        Close the session and clear the cache
+        """
+        self.session.close()
+        self.cache.clear()
+
+    def __init__(self, key, use_gzip=None):
+        """
+        :param str: The API key
+        :param None: Deprecated, compression is always used
+        """
+        if use_gzip is not None:
+            warn_use_gzip()
+
+        # Initialize the cache of the responses
+        self.cache = TTLCache(self.CACHE_SIZE, self.CACHE_TTL)
+        # Separate connect and read timeouts of the requests
+        self.timeout = (CONNECT_TIMEOUT, READ_TIMEOUT)
         # Initialize the session
         self.session = requests.Session()
         # Automatically add key header to all requests made within the session
-        self.session.headers.update({'X-API-Key': key})
-        # Set header to allow gzip encoding to improve speed, if wanted
-        if use_gzip:
-            self.session.headers.update({'Accept-Encoding': 'gzip'})
+        # and keep the connections alive so they can be reused
+        self.session.headers.update({'X-API-Key': key,
+                                     'Connection': 'keep-alive'})
+        # Allow all the compressions urllib3 can decode to improve speed, this
+        # includes 'br' if 'brotli' is installed and 'zstd' if 'compression.zstd'
+        # (Python 3.14+) or 'backports.zstd' is available
+        accept_encoding = make_headers(accept_encoding=True)['accept-encoding']
+        self.session.headers.update({'Accept-Encoding': accept_encoding})
 
-        # retry a request in case of a timeout, socket error and 5xx errors
-        retries = Retry(total=3, backoff_factor=1, status_forcelist=[500, 501, 502, 503, 504])
-        self.session.mount("http://", HTTPAdapter(max_retries=retries))
-        self.session.mount("https://", HTTPAdapter(max_retries=retries))
+        # retry a request in case of a timeout, socket error, rate limit and
+        # 5xx errors, with jittered backoff to avoid synchronized retries; the
+        # last response is returned, so InvalidRequestError is raised for it
+        retries = JitterRetry(
+            total=3, status_forcelist=[429, 500, 501, 502, 503, 504],
+            raise_on_status=False)
+        # use larger connection pools, so concurrent requests from more threads
+        # reuse the open connections instead of opening new ones
+        for prefix in ("http://", "https://"):
+            self.session.mount(prefix, HTTPAdapter(
+                max_retries=retries, pool_connections=20, pool_maxsize=50,
+                pool_block=False))
 
-    def execute_request(self, url, **params):
+    def execute_request(self, url, no_cache=False, **params):
         """
         Make a request and return the JSON response
 
+        The responses are cached for CACHE_TTL seconds, so repeated identical
+        requests do not reach the API. The cached data are returned to all the
+        callers, so the returned data must not be modified.
+
         :param str: URL of the requests (without the parameters)
+        :param bool: If True, the cache is bypassed
         :param kwargs: Arguments of the request (lat, lon, ...)
         """
-        response = self.session.get(url, params=params, timeout=10)
+        # Parameters with None value are not sent, same as in requests
+        items = tuple(sorted((k, v) for k, v in params.items()
+                             if v is not None))
+        try:
+            # Equal values of different types (e.g. True and 1) differ
+            key = (url, items, tuple(type(v) for _, v in items))
+            hash(key)
+        except TypeError:
+            # Unhashable parameters (e.g. lists) cannot be cached
+            key = None
+
+        if key is not None and not no_cache:
+            data = self.cache.get(key)
+            if data is not None:
+                return data
+
+        if key is None:
+            # Let requests encode the unhashable parameters
+            response = self.session.get(
+                url, params=params, timeout=self.timeout)
+        else:
+            # Pass the full URL, so the parameters are not encoded again
+            # (the URL can already contain query string, e.g. in endpoint)
+            sep = '&' if '?' in url else '?'
+            full_url = ('{}{}{}'.format(url, sep, encode_params(*key[1:]))
+                        if items else url)
+            response = self.session.get(full_url, timeout=self.timeout)
         if response.status_code != 200:
-            raise InvalidRequestError(response)
+            # Only pass the beginning of the body, the error is not decoded
+            raise InvalidRequestError(response.status_code, url,
+                                      response.content[:ERROR_SNIPPET_SIZE])
 
-        data = response.json()
+        # Decode the raw (already decompressed) bytes without str conversion
+        data = json_loads(response.content)
+        if key is not None:
+            self.cache.set(key, data)
 
         return data
+
+    def execute_request_stream(self, url, prefix='hourly.data.item', **params):
+        """
+        Make a request and iterate over items of the JSON response
+
+        The response is parsed while it is being downloaded, and only the items
+        under 'prefix' are yielded, so the whole response never has to be kept
+        in the memory. The iteration can be stopped early, e.g. when only first
+        few timesteps are needed.
+
+        NOTE: This needs 'ijson' module, which is not needed for any other
+        parts of pymeteosource. To use this feature, use
+        'pip install pymeteosource[stream]' to install this package, or install
+        ijson manually using 'pip install ijson'.
+
+        :param str: URL of the requests (without the parameters)
+        :param str: ijson prefix of the items to yield, e.g. 'daily.data.item'
+        :param kwargs: Arguments of the request (lat, lon, ...)
+        :return generator: Generator of dicts, one per item
+        """
+        # Lazy-load 'ijson', so it is only required for streaming
+        import ijson  # pylint: disable=C0415
+
+        with self.session.get(url, params=params,
+                              timeout=self.timeout,
+                              stream=True) as response:
+            if response.status_code != 200:
+                # Only download the beginning of the body
+                snippet = response.raw.read(ERROR_SNIPPET_SIZE,
+                                            decode_content=True)
+                raise InvalidRequestError(response.status_code, url, snippet)
+
+            # Let urllib3 decompress the raw stream for the parser
+            response.raw.decode_content = True
+            yield from ijson.items(response.raw, prefix, use_float=True)
+
+
+class HTTPXRequestHandler(RequestHandler):
+    """
+    Object that handles sending the requests to API using HTTP/2
+
+    The requests are sent using 'httpx' client with HTTP/2 enabled, so
+    the requests made from more threads are multiplexed over one connection.
+
+    NOTE: This needs 'httpx' and 'h2' modules, which are not needed for any
+    other parts of pymeteosource. To use this feature, use
+    'pip install pymeteosource[httpx2]' to install this package, or install
+    them manually using 'pip install httpx[http2]'.
+
+    Attributes
+    ----------
+    session : httpx.Client
+        A client object to send the requests
+    cache : TTLCache
+        Cache of the responses, keyed by the URL and the parameters
+    timeout : httpx.Timeout
+        Timeouts of the requests
+    _instances : dict
+        Instances shared within the process, keyed by the API key
+    """
+    _instances = {}
+
+    # The requests session of the parent is replaced by httpx client
+    def __init__(self, key):  # pylint: disable=W0231
+        """
+        :param str: The API key
+        """
+        # Lazy-load 'httpx', so it is only required for this transport
+        import httpx  # pylint: disable=C0415
+
+        # Initialize the cache of the responses
+        self.cache = TTLCache(self.CACHE_SIZE, self.CACHE_TTL)
+
+        # Separate connect timeout, the others (incl. pool) use read timeout
+        self.timeout = httpx.Timeout(READ_TIMEOUT, connect=CONNECT_TIMEOUT)
+
+        # Initialize the client with the key header, httpx's default
+        # Accept-Encoding only lists the compressions httpx can decode
+        self.session = httpx.Client(
+            http2=True, timeout=self.timeout, headers={'X-API-Key': key},
+            transport=httpx.HTTPTransport(http2=True, retries=3))
+
+    def execute_request_stream(self, url, prefix='hourly.data.item', **params):
+        """
+        Make a request and iterate over items of the JSON response
+
+        See RequestHandler.execute_request_stream for details.
+
+        :param str: URL of the requests (without the parameters)
+        :param str: ijson prefix of the items to yield, e.g. 'daily.data.item'
+        :param kwargs: Arguments of the request (lat, lon, ...)
+        :return generator: Generator of dicts, one per item
+        """
+        # Lazy-load 'ijson', so it is only required for streaming
+        import ijson  # pylint: disable=C0415
+
+        with self.session.stream('GET', url, params=params) as response:
+            if response.status_code != 200:
+                # Only download the beginning of the body
+                snippet = next(response.iter_bytes(ERROR_SNIPPET_SIZE), b'')
+                raise InvalidRequestError(response.status_code, url,
+                                          snippet[:ERROR_SNIPPET_SIZE])
+
+            # Feed the decompressed chunks to the parser as they arrive
+            items = ijson.sendable_list()
+            parser = ijson.items_coro(items, prefix, use_float=True)
+            for chunk in response.iter_bytes():
+                parser.send(chunk)
+                yield from items
+                del items[:]
+            parser.close()
+            yield from items
+
+
+class AsyncRequestHandler:
+    """
+    Object that handles sending the requests to API asynchronously
+
+    NOTE: This needs 'aiohttp' module, which is not needed for any other
+    parts of pymeteosource. To use this feature, use
+    'pip install pymeteosource[async]' to install this package, or install
+    aiohttp manually using 'pip install aiohttp'.
+
+    The instance should be created from within a running event loop (inside
+    a coroutine) and the session has to be closed with 'await handler.close()'
+    when it is no longer needed. It can also be used as an async context
+    manager, which closes the session automatically.
+
+    Attributes
+    ----------
+    session : aiohttp.ClientSession
+        A session object to send the requests. All the requests made within
+        the session share the same connection pool.
+
+    Methods
+    -------
+    execute_request
+        Execute request and return the JSON response
+    close
+        Close the underlying session
+    """
+
+    def __init__(self, key):
+        """
+        :param str: The API key
+        """
+        # Lazy-load 'aiohttp', so it is only required for async requests
+        import aiohttp  # pylint: disable=C0415
+
+        # Initialize the session with the key header and gzip encoding
+        self.session = aiohttp.ClientSession(
+            headers={'X-API-Key': key, 'Accept-Encoding': 'gzip'},
+            timeout=aiohttp.ClientTimeout(total=READ_TIMEOUT,
+                                          sock_connect=CONNECT_TIMEOUT),
+            connector=aiohttp.TCPConnector(limit=100, ttl_dns_cache=300))
+
+    async def execute_request(self, url, **params):
+        """
+        Make a request and return the JSON response
+
+        :param str: URL of the requests (without the parameters)
+        :param kwargs: Arguments of the request (lat, lon, ...)
+        """
+        async with self.session.get(url, params=params) as response:
+            if response.status != 200:
+                # Only download the beginning of the body
+                snippet = await response.content.read(ERROR_SNIPPET_SIZE)
+                raise InvalidRequestError(response.status, url, snippet)
+
+            return await response.json()
+
+    async def close(self):
+        """
+        Close the underlying session
+        """
+        await self.session.close()
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *args):
+        await self.close()
@@ -0,0 +1,4 @@
+"""Constants that define transports used for the requests"""
+
+REQUESTS = 'requests'
+HTTPX2 = 'httpx2'
@@ -7,7 +7,11 @@ setup(
     name="pymeteosource",
     packages=find_packages(),
     install_requires=["wheel", "requests", "pytz"],
-    extras_require={"pandas": "pandas"},
+    extras_require={"pandas": "pandas", "async": "aiohttp",
+                    "orjson": "orjson",
+                    "compression": "urllib3[brotli,zstd]",
+                    "stream": "ijson",
+                    "httpx2": "httpx[http2]"},
     description="Meteosource API wrapper library",
     long_description=Path("README.md").read_text(encoding="utf-8"),
     long_description_content_type='text/markdown',
@@ -0,0 +1,8 @@
+"""Configuration of pymeteosource tests"""
+
+import os
+
+# Load API key from environment variable, only the tests marked as 'network'
+# need the real key, the mocked tests can use a dummy one
+REAL_API_KEY = os.environ.get('METEOSOURCE_API_KEY')
+API_KEY = REAL_API_KEY or 'dummy-api-key'
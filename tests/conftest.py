@@ -0,0 +1,58 @@
+"""Shared fixtures for pymeteosource tests"""
+
+import io
+import json
+from unittest.mock import MagicMock
+import pytest
+import requests
+
+from pymeteosource.api import Meteosource
+from pymeteosource.request_handler import HTTPXRequestHandler
+from pymeteosource.types import tiers
+
+from .config import API_KEY, REAL_API_KEY
+from .sample_data import SAMPLE_POINT
+
+
+def pytest_collection_modifyitems(items):
+    """Skip the tests using live API when the API key is not provided"""
+    if REAL_API_KEY is not None:
+        return
+    skip = pytest.mark.skip(reason="METEOSOURCE_API_KEY is not set")
+    for item in items:
+        if 'network' in item.keywords:
+            item.add_marker(skip)
+
+
+@pytest.fixture(scope='session')
+def meteo():
+    """Meteosource instance shared by the tests"""
+    return Meteosource(API_KEY, tiers.FLEXI)
+
+
+@pytest.fixture
+def mock_response(monkeypatch):
+    """
+    Mock the HTTP responses of given request handler's session
+
+    The returned function takes the request handler, the status code and
+    the body (bytes, or data to be serialized to JSON) and returns
+    the MagicMock that replaced the session's 'get' method.
+    """
+    def _mock(handler, status=200, body=SAMPLE_POINT):
+        if not isinstance(body, bytes):
+            body = json.dumps(body, default=dict).encode()
+        if isinstance(handler, HTTPXRequestHandler):
+            import httpx  # pylint: disable=C0415
+            response = httpx.Response(status, content=body)
+        else:
+            response = requests.Response()
+            response.status_code = status
+            # Both the read and the streamed content are available
+            response._content = body  # pylint: disable=W0212
+            response.raw = io.BytesIO(body)
+        get = MagicMock(return_value=response)
+        monkeypatch.setattr(handler.session, 'get', get)
+        return get
+
+    return _mock
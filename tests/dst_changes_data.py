@@ -1,6 +1,8 @@
 """Sample API output dict for testing"""
 
-LONG_DAY = {
+from .sample_data import freeze
+
+LONG_DAY = freeze({
     "lat":"51.50853N",
     "lon":"0.12574W",
     "elevation":25,
@@ -434,4 +436,4 @@ LONG_DAY = {
                 }
             }]
     }
-}
+})
@@ -1,6 +1,26 @@
 """Sample API output dict for testing"""
 
-SAMPLE_POINT = {
+from types import MappingProxyType
+
+
+def freeze(data):
+    """
+    Recursively convert dicts to read-only mappings and lists to tuples
+
+    The sample data are shared by the tests, so any code that would modify
+    them raises TypeError instead of affecting the other tests.
+
+    :param object: The data to freeze
+    :return object: The frozen data
+    """
+    if isinstance(data, dict):
+        return MappingProxyType({k: freeze(v) for k, v in data.items()})
+    if isinstance(data, list):
+        return tuple(freeze(x) for x in data)
+    return data
+
+
+SAMPLE_POINT = freeze({
     "lat":"51.50853N",
     "lon":"0.12574W",
     "elevation":25,
@@ -11359,9 +11379,9 @@ SAMPLE_POINT = {
             "description": "LOCALLY THUNDERSTORMS"
            }]
     }
-}
+})
 
-SAMPLE_TIME_MACHINE = {
+SAMPLE_TIME_MACHINE = freeze({
   "lat": "50.08804N",
   "lon": "14.42076E",
   "elevation": 202,
@@ -12146,4 +12166,4 @@ SAMPLE_TIME_MACHINE = {
          "probability":31
       }
    }
-}
+})
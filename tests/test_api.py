@@ -1,23 +1,30 @@
 """Tests for pymeteosource"""
 
-import os
 import sys
+import pickle
+import asyncio
+import threading
+from http.server import BaseHTTPRequestHandler, HTTPServer
 from datetime import datetime, date
-from unittest.mock import MagicMock
+from unittest.mock import MagicMock, AsyncMock, patch
 from os.path import realpath, join, dirname
 import pytz
 import pytest
 import pandas
+import requests
 
 from pymeteosource.api import Meteosource
-from pymeteosource.types import tiers, endpoints, units, sections
+from pymeteosource.request_handler import (JitterRetry, HTTPXRequestHandler,
+                                          TTLCache, RequestHandler)
+from pymeteosource.types import tiers, endpoints, units, sections, transports
 from pymeteosource.types.time_formats import F1
 from pymeteosource.data import (Forecast, SingleTimeData, MultipleTimesData,
                                 AlertsData)
 from pymeteosource.errors import (InvalidArgumentError, InvalidIndexTypeError,
                                   InvalidStrIndexError, EmptyInstanceError,
                                   InvalidDatetimeIndexError, InvalidDateFormat,
-                                  InvalidDateSpecification, InvalidDateRange)
+                                  InvalidDateSpecification, InvalidDateRange,
+                                  InvalidTransportError, InvalidRequestError)
 
 from .sample_data import SAMPLE_POINT, SAMPLE_TIME_MACHINE
 from .dst_changes_data import LONG_DAY
@@ -26,25 +33,27 @@ from .variables_list import (CURRENT, PRECIPITATION_CURRENT, WIND, MINUTELY,
                              ALL_DAY, PART_DAY, ASTRO, SUN, MOON, STATS,
                              STATS_TEMP, STATS_WIND, STATS_PREC, ALERTS)
 
-sys.path.insert(0, realpath(join(dirname(__file__), "..")))
+from .config import API_KEY
 
-# Load API key from environment variable
-API_KEY = os.environ.get('METEOSOURCE_API_KEY')
-if API_KEY is None:
-    raise ValueError("You need to provide API key as environment variable.")
+sys.path.insert(0, realpath(join(dirname(__file__), "..")))
 
 
-def test_to_dst_changes():
+def test_to_dst_changes(meteo, monkeypatch):
     """Test exporting to pandas"""
-    m = Meteosource(API_KEY, tiers.FLEXI)
+    m = meteo
     # We mock the API requests with sample data
-    m.req_handler.execute_request = MagicMock(return_value=LONG_DAY)
+    monkeypatch.setattr(m.req_handler, 'execute_request',
+                        MagicMock(return_value=LONG_DAY))
     # Get the mocked forecast
     f = m.get_point_forecast(place_id='london', tz='Europe/Prague')
     # Check the ambiguous date is handled properly
     dts = ['2021-10-31T01:00:00', '2021-10-31T02:00:00',
            '2021-10-31T02:00:00', '2021-10-31T03:00:00']
     assert f.hourly.dates_str == dts
+    # Indexing by the ambiguous string returns the first occurence
+    assert f.hourly['2021-10-31T02:00:00'] is f.hourly[1]
+    # Indexing by datetime distinguishes both occurences
+    assert f.hourly[f.hourly[2].date] is f.hourly[2]
 
     # Check the astro datetimes are OK when DST changes
     tz = pytz.timezone('Europe/Prague')
@@ -66,12 +75,201 @@ def test_build_url():
             m = Meteosource(API_KEY, tier)
             assert m._build_url(endpoint) == url % (tier, endpoint)
 
-
-def test_get_point_forecast_exceptions():
-    """Test detection of invalid point specification detection"""
+    # Changing the tier or host changes the URLs
+    m = Meteosource(API_KEY, tiers.FREE)
+    assert m._build_url(endpoints.POINT) == url % (tiers.FREE, endpoints.POINT)
+    m.tier = tiers.FLEXI
+    assert m._build_url(endpoints.POINT) == url % (tiers.FLEXI, endpoints.POINT)
+    m.host = 'http://localhost'
+    assert m._build_url(endpoints.POINT) == 'http://localhost/v1/flexi/point'
+
+
+def test_shared_request_handler(meteo):
+    """Test the request handler is shared for the same API key"""
+    assert Meteosource(API_KEY, tiers.FREE).req_handler is meteo.req_handler
+    assert Meteosource('other', tiers.FREE).req_handler is not meteo.req_handler
+
+
+def test_httpx_transport(mock_response):
+    """Test requests using HTTP/2 httpx transport"""
+    httpx = pytest.importorskip('httpx')
+    pytest.importorskip('h2')
+    m = Meteosource(API_KEY, tiers.FLEXI, transport=transports.HTTPX2)
+    assert isinstance(m.req_handler, HTTPXRequestHandler)
+    # Only compressions httpx can decode are accepted
+    headers = m.req_handler.session.headers
+    assert headers['Accept-Encoding'] == httpx.Client().headers['Accept-Encoding']
+    m2 = Meteosource(API_KEY, tiers.FLEXI, transport=transports.HTTPX2)
+    assert m2.req_handler is m.req_handler
+
+    # We mock the API response with sample data
+    get = mock_response(m.req_handler)
+    f = m.get_point_forecast(place_id='london', no_cache=True)
+    assert f.hourly[1].wind.angle == 106
+    # All the timeouts are bounded, including pool and write
+    timeout = get.call_args.kwargs['timeout']
+    assert timeout == httpx.Timeout(10, connect=3.05)
+
+    with pytest.raises(InvalidTransportError):
+        Meteosource(API_KEY, tiers.FLEXI, transport='carrier pigeon')
+
+
+def test_shared_request_handler_threads():
+    """Test threads get the same shared request handler and eviction"""
+    handlers = []
+    threads = [threading.Thread(
+        target=lambda: handlers.append(RequestHandler.get('threads')))
+        for _ in range(20)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    assert len(handlers) == 20
+    assert all(h is handlers[0] for h in handlers)
+
+    RequestHandler.evict('threads')
+    assert RequestHandler.get('threads') is not handlers[0]
+    RequestHandler.evict('threads')
+
+
+def test_compression_headers():
+    """Test compression is always requested"""
     m = Meteosource(API_KEY, tiers.FLEXI)
+    assert 'gzip' in m.req_handler.session.headers['Accept-Encoding']
+
+    with pytest.warns(DeprecationWarning) as w:
+        m = Meteosource(API_KEY, tiers.FLEXI, use_gzip=False)
+    # The warning points to the caller
+    assert w[0].filename == __file__
+
+    # The baseline signature of RequestHandler still works
+    with pytest.warns(DeprecationWarning) as w:
+        handler = RequestHandler(API_KEY, True)
+    assert w[0].filename == __file__
+    assert 'gzip' in handler.session.headers['Accept-Encoding']
+    with pytest.warns(DeprecationWarning) as w:
+        assert RequestHandler.get(API_KEY, True) is m.req_handler
+    assert w[0].filename == __file__
+    assert 'gzip' in m.req_handler.session.headers['Accept-Encoding']
+
+
+def test_response_cache(meteo, monkeypatch, mock_response):
+    """Test identical requests are served from the cache"""
+    m = meteo
+    monkeypatch.setattr(m.req_handler, 'cache', TTLCache(2, 300))
+    # We mock the API response with sample data
+    get = mock_response(m.req_handler)
+
+    f1 = m.get_point_forecast(place_id='london')
+    f2 = m.get_point_forecast(place_id='london')
+    assert get.call_count == 1
+    assert f1.hourly[1].wind.angle == f2.hourly[1].wind.angle
+    m.get_point_forecast(place_id='london', no_cache=True)
+    assert get.call_count == 2
+    m.get_point_forecast(place_id='paris')
+    assert get.call_count == 3
+    # The parameters are encoded to the URL
+    assert 'place_id=paris' in get.call_args.args[0]
+
+
+def test_ttl_cache():
+    """Test expiration and size limit of the cache"""
+    cache = TTLCache(2, 0)
+    cache.set('a', 1)
+    assert cache.get('a') is None
+    cache = TTLCache(2, 300)
+    for k in 'abc':
+        cache.set(k, 1)
+    assert cache.get('a') is None and cache.get('c') == 1
+
+
+def test_request_params_encoding(meteo, mock_response):
+    """Test the parameters are encoded the same way as in requests"""
+    m = meteo
+    # We mock the API response with sample data
+    get = mock_response(m.req_handler)
+
+    point_url = m._build_url(endpoints.POINT)
+    for url, params in [
+            (point_url, {'language': None, 'place_id': 'london',
+                         'units': None}),
+            (point_url, {'lat': 50.5, 'lon': -14,
+                         'sections': ('current', 'daily')}),
+            (point_url, {'sections': ['current', 'daily'], 'timezone': 'UTC'}),
+            (point_url, {'sections': {'current'}, 'timezone': 'UTC'}),
+            (point_url + '?foo=1', {'place_id': 'london'}),
+            (point_url, {'x': True}), (point_url, {'x': 1})]:
+        m.req_handler.execute_request(url, no_cache=True, **params)
+        prepared = requests.Request('GET', url, params=params).prepare().url
+        sent = requests.Request('GET', *get.call_args.args,
+                                params=get.call_args.kwargs.get('params'))
+        assert sent.prepare().url == prepared
+
+
+def test_invalid_request(meteo, mock_response):
+    """Test only the beginning of the error response is used"""
+    m = meteo
+    # We mock the API error response
+    mock_response(m.req_handler, status=404, body=b'x' * 10000)
+
+    with pytest.raises(InvalidRequestError) as e:
+        m.get_point_forecast(place_id='london', no_cache=True)
+    assert e.value.status_code == 404
+    assert e.value.url == m._build_url(endpoints.POINT)
+    assert len(e.value.snippet) == 512
+
+
+def test_jitter_retry():
+    """Test the backoff of retries is randomized and capped"""
+    retry = JitterRetry(total=10)
+    assert retry.get_backoff_time() <= 1
+    for _ in range(8):
+        retry = retry.increment(method='GET', url='/', error=ConnectionError())
+    assert isinstance(retry, JitterRetry)
+    backoffs = [retry.get_backoff_time() for _ in range(100)]
+    assert all(0 <= b <= JitterRetry.BACKOFF_CAP for b in backoffs)
+    assert len(set(backoffs)) > 1
+
+
+def test_retries_exhausted(monkeypatch):
+    """Test InvalidRequestError is raised when retries are exhausted"""
+    class RateLimited(BaseHTTPRequestHandler):
+        """Local server that always responds with 429"""
+        requests_count = 0
+
+        def do_GET(self):  # pylint: disable=C0103
+            """Respond to all requests with 429"""
+            RateLimited.requests_count += 1
+            self.send_response(429)
+            self.end_headers()
+            self.wfile.write(b'Too many requests')
+
+        def log_message(self, *args):  # pylint: disable=W0221
+            """Do not print the requests"""
+
+    # Do not wait between the retries
+    monkeypatch.setattr(JitterRetry, 'BACKOFF_CAP', 0)
+    server = HTTPServer(('127.0.0.1', 0), RateLimited)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    try:
+        url = 'http://127.0.0.1:%s/point' % server.server_port
+        with pytest.raises(InvalidRequestError) as e:
+            RequestHandler('key').execute_request(url, place_id='london')
+    finally:
+        server.shutdown()
+        server.server_close()
+    assert e.value.status_code == 429
+    assert e.value.snippet == b'Too many requests'
+    assert RateLimited.requests_count == 4
+
+
+def test_get_point_forecast_exceptions(meteo, monkeypatch):
+    """Test detection of invalid point specification detection"""
+    m = meteo
     # We mock the API requests with sample data
-    m.req_handler.execute_request = MagicMock(return_value=SAMPLE_POINT)
+    monkeypatch.setattr(m.req_handler, 'execute_request',
+                        MagicMock(return_value=SAMPLE_POINT))
 
     # Test invalid place definitions
     with pytest.raises(InvalidArgumentError) as e:
@@ -98,11 +296,48 @@ def test_get_point_forecast_exceptions():
     m.get_point_forecast(lat=50, lon=14)
 
 
-def test_get_time_machine_exceptions():
-    """Test date specification for get_time_machine"""
+def test_get_point_forecasts_async():
+    """Test concurrent forecasts for multiple points"""
+    pytest.importorskip('aiohttp')
     m = Meteosource(API_KEY, tiers.FLEXI)
     # We mock the API requests with sample data
-    m.req_handler.execute_request = MagicMock(return_value=SAMPLE_TIME_MACHINE)
+    mocked = AsyncMock(return_value=SAMPLE_POINT)
+    with patch('pymeteosource.api.AsyncRequestHandler.execute_request',
+               mocked):
+        places = [{'place_id': 'london'}, {'lat': 50, 'lon': 14}]
+        fs = asyncio.run(m.get_point_forecasts_async(places, tz='UTC'))
+
+    assert len(fs) == 2
+    assert all(isinstance(f, Forecast) for f in fs)
+    assert mocked.call_args_list[0].kwargs['place_id'] == 'london'
+    assert mocked.call_args_list[1].kwargs['lat'] == 50
+
+    # Test invalid place definition
+    with pytest.raises(InvalidArgumentError):
+        asyncio.run(m.get_point_forecasts_async([{'place_id': 'london',
+                                                  'lat': 50}]))
+
+
+def test_execute_request_stream(meteo, mock_response):
+    """Test streaming items of the response"""
+    pytest.importorskip('ijson')
+    m = meteo
+    # We mock the API response with sample data
+    mock_response(m.req_handler)
+
+    url = m._build_url(endpoints.POINT)
+    hours = m.req_handler.execute_request_stream(url, place_id='london')
+    first = next(hours)
+    assert first == SAMPLE_POINT['hourly']['data'][0]
+    assert len(list(hours)) == len(SAMPLE_POINT['hourly']['data']) - 1
+
+
+def test_get_time_machine_exceptions(meteo, monkeypatch):
+    """Test date specification for get_time_machine"""
+    m = meteo
+    # We mock the API requests with sample data
+    monkeypatch.setattr(m.req_handler, 'execute_request',
+                        MagicMock(return_value=SAMPLE_TIME_MACHINE))
 
     # Test invalid dates
     with pytest.raises(InvalidDateFormat) as e:
@@ -147,19 +382,25 @@ def test_get_time_machine_exceptions():
 
     # Test valid date definitions
     m.get_time_machine(date='2021-01-01', place_id='london')
-    m.get_time_machine(date=['2021-01-01', datetime(2021, 1, 2)],
-                       place_id='london')
+    tm = m.get_time_machine(date=['2021-01-01', datetime(2021, 1, 2)],
+                            place_id='london')
+    # Test indexing of the appended data, the mocked days are the same,
+    # so the first occurence is returned
+    last = tm.data.dates_str.index(tm.data.dates_str[-1])
+    assert tm.data[tm.data.dates_str[-1]] is tm.data[last]
+    assert tm.data[tm.data.dates_dt[-1]] is tm.data[last]
     m.get_time_machine(date_from='2021-01-01', date_to=datetime(2021, 1, 3),
                        place_id='london')
     m.get_time_machine(date_from='2021-01-01', date_to=date(2021, 1, 3),
                        place_id='london')
 
 
-def test_forecast_indexing():
+def test_forecast_indexing(meteo, monkeypatch):
     """Test indexing MultipleTimesData with int, string and datetimes"""
-    m = Meteosource(API_KEY, tiers.FLEXI)
+    m = meteo
     # We mock the API requests with sample data
-    m.req_handler.execute_request = MagicMock(return_value=SAMPLE_POINT)
+    monkeypatch.setattr(m.req_handler, 'execute_request',
+                        MagicMock(return_value=SAMPLE_POINT))
     # Get the mocked forecast
     f = m.get_point_forecast(place_id='london', tz='UTC')
 
@@ -213,11 +454,39 @@ def test_forecast_indexing():
     assert f.hourly[0].date == dt
 
 
-def test_to_pandas():
+def test_single_time_data_slots(meteo, monkeypatch):
+    """Test SingleTimeData instances use shared classes with __slots__"""
+    m = meteo
+    # We mock the API requests with sample data
+    monkeypatch.setattr(m.req_handler, 'execute_request',
+                        MagicMock(return_value=SAMPLE_POINT))
+    f = m.get_point_forecast(place_id='london')
+
+    assert not hasattr(f.hourly[0], '__dict__')
+    assert type(f.hourly[0]) is type(f.hourly[1])
+    assert isinstance(f.hourly[0], SingleTimeData)
+    with pytest.raises(AttributeError):
+        f.hourly[0].unknown = 1
+
+    # Test the instances can be pickled
+    h = pickle.loads(pickle.dumps(f.daily[0]))
+    assert h.to_dict() == f.daily[0].to_dict()
+
+    # Test variables that cannot be slots are stored in __dict__
+    data = {'pm2.5': 1, 'temperature': 2, 'to_dict': 3}
+    x = SingleTimeData(data, 'UTC')
+    assert x['pm2.5'] == 1 and x.temperature == 2
+    assert set(x.__dict__) == {'pm2.5', 'to_dict'}
+    h = pickle.loads(pickle.dumps(x))
+    assert h['pm2.5'] == 1 and h.temperature == 2
+
+
+def test_to_pandas(meteo, monkeypatch):
     """Test exporting to pandas"""
-    m = Meteosource(API_KEY, tiers.FLEXI)
+    m = meteo
     # We mock the API requests with sample data
-    m.req_handler.execute_request = MagicMock(return_value=SAMPLE_POINT)
+    monkeypatch.setattr(m.req_handler, 'execute_request',
+                        MagicMock(return_value=SAMPLE_POINT))
     # Get the mocked forecast
     f = m.get_point_forecast(place_id='london')
 
@@ -236,15 +505,19 @@ def test_to_pandas():
     assert len(df) == 30
     assert isinstance(df.index, pandas.core.indexes.datetimes.DatetimeIndex)
 
+    # The index is cached, repeated export gives the same result
+    assert f.hourly.to_pandas().equals(f.hourly.to_pandas())
+
     df = f.alerts.to_pandas()
     assert len(df) == 4
 
 
-def test_to_dict():
+def test_to_dict(meteo, monkeypatch):
     """Test exporting to pandas"""
-    m = Meteosource(API_KEY, tiers.FLEXI)
+    m = meteo
     # We mock the API requests with sample data
-    m.req_handler.execute_request = MagicMock(return_value=SAMPLE_POINT)
+    monkeypatch.setattr(m.req_handler, 'execute_request',
+                        MagicMock(return_value=SAMPLE_POINT))
     # Get the mocked forecast
     f = m.get_point_forecast(place_id='london')
 
@@ -252,10 +525,10 @@ def test_to_dict():
     assert 'afternoon_wind_angle' in f.daily[0].to_dict()
 
 
-def test_forecast_structure():
+@pytest.mark.network
+def test_forecast_structure(meteo):
     """Test structure of the Forecast object on real data"""
-    # Initialize the Meteosource object
-    m = Meteosource(API_KEY, tiers.FLEXI)
+    m = meteo
     # Get real forecast data (not mocked)
     f = m.get_point_forecast(place_id='london', tz='Asia/Kabul',
                              units=units.METRIC, sections=sections.ALL)
@@ -328,15 +601,15 @@ def test_forecast_structure():
     assert str(e.value) == 'The instance does not contain any data!'
 
 
-def test_time_machine_structure():
+@pytest.mark.network
+def test_time_machine_structure(meteo):
     """Test structure of the Forecast object on real data"""
     # Shortcut for UTC timezone object
     utc = pytz.timezone('UTC')
     # Shortcut for Kabul timezone object
     kbl = pytz.timezone('US/Pacific')
 
-    # Initialize the Meteosource object
-    m = Meteosource(API_KEY, tiers.FLEXI)
+    m = meteo
     # Get real forecast data (not mocked)
     tm = m.get_time_machine(date=[date(2021, 1, 1), '2019-05-05',
                             datetime(2020, 12, 15, 1, 10, 25)],
@@ -353,11 +626,12 @@ def test_time_machine_structure():
     assert tm.data[0].date == dt
 
 
-def test_alerts():
+def test_alerts(meteo, monkeypatch):
     """Test alerts"""
-    m = Meteosource(API_KEY, tiers.FLEXI)
+    m = meteo
     # We mock the API requests with sample data
-    m.req_handler.execute_request = MagicMock(return_value=SAMPLE_POINT)
+    monkeypatch.setattr(m.req_handler, 'execute_request',
+                        MagicMock(return_value=SAMPLE_POINT))
     # Get the mocked alerts data
     alerts = m.get_point_forecast(place_id='london', tz='UTC').alerts
 